@@ -1,9 +1,18 @@
 import sqlite3
 import json
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from difflib import SequenceMatcher
 
+def _usb_id(value: Any) -> Optional[int]:
+    """USB ID as stored in the database: hex strings are parsed, ints pass through, anything else is None"""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value, 16)
+    except (TypeError, ValueError):
+        return None
+
 class UniversalPhoneDetector:
     """Enhanced phone detector that can identify any connected device"""
     
@@ -46,10 +55,11 @@ class UniversalPhoneDetector:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        vendor_id = detection_data.get('vendor_id')
-        product_id = detection_data.get('product_id')
+        # USB IDs are stored as integers; malformed IDs simply find no match
+        vendor_id = _usb_id(detection_data.get('vendor_id'))
+        product_id = _usb_id(detection_data.get('product_id'))
         
-        if vendor_id and product_id:
+        if vendor_id is not None and product_id is not None:
             cursor.execute('''
                 SELECT * FROM phones 
                 WHERE vendor_id = ? AND product_id = ?
@@ -95,10 +105,10 @@ class UniversalPhoneDetector:
     
     def _match_by_emergency_mode(self, detection_data: Dict[str, Any]) -> Dict[str, Any]:
         """Match device in emergency/download modes"""
-        vendor_id = detection_data.get('vendor_id')
+        vendor_id = _usb_id(detection_data.get('vendor_id'))
         mode = detection_data.get('mode', '')
         
-        if vendor_id and 'download' in mode.lower() or 'edl' in mode.lower():
+        if vendor_id is not None and 'download' in mode.lower() or 'edl' in mode.lower():
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
@@ -234,8 +244,8 @@ class UniversalPhoneDetector:
             'supported_locks': json.loads(db_record[5]),
             'detection_confidence': confidence,
             'notes': db_record[6],
-            'vendor_id': db_record[7],
-            'product_id': db_record[8],
+            'vendor_id': f'{db_record[7]:04x}' if db_record[7] is not None else None,
+            'product_id': f'{db_record[8]:04x}' if db_record[8] is not None else None,
             'detection_method': 'database_match'
         }
     
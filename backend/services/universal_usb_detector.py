@@ -1,17 +1,126 @@
 import subprocess
 import platform
+import copy
+import functools
 import usb.core
 import usb.util
 import struct
+import threading
 import time
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any
 import re
 
+try:
+    import pyudev
+except ImportError:  # hotplug notifications are optional; detection falls back to polling
+    pyudev = None
+
+# Host OS, resolved once per process
+_SYSTEM = platform.system().lower()
+
+# Keyword matchers for OS enumeration output, compiled once per process
+WINDOWS_PHONE_KEYWORDS = re.compile(r'Android|ADB|Composite|Phone|Mobile')
+LINUX_PHONE_KEYWORDS = re.compile(r'android|google|samsung|huawei|xiaomi|oppo|hisense', re.IGNORECASE)
+MACOS_PHONE_KEYWORDS = re.compile(r'iPhone|iPad|Android')
+
+# `adb devices` / `fastboot devices` rows for ready devices only (not offline/unauthorized)
+ADB_DEVICE_LINE = re.compile(r'^(\S+)\s+device\s*$', re.MULTILINE)
+FASTBOOT_LINE = re.compile(r'^(\S+)\s+fastboot\s*$', re.MULTILINE)
+
+# Stop reading enumeration output once this many candidate lines are found
+MAX_ENUMERATED_DEVICES = 10
+
+# Hotplug-cached detections are re-run after this many seconds even without a udev
+# event; e.g. accepting the ADB RSA prompt changes the result without re-enumerating
+DETECTION_CACHE_TTL = 5.0
+
+# Echoed after each command sent to a persistent adb shell to delimit its output
+ADB_SHELL_SENTINEL = '__END__'
+
+# Known phone vendor IDs
+PHONE_VENDORS = {
+    '04e8': 'Samsung',
+    '0bb4': 'HTC',
+    '12d1': 'Huawei',
+    '18d1': 'Google',
+    '22d9': 'Oppo',
+    '2717': 'Xiaomi',
+    '1782': 'Hisense',
+    '05ac': 'Apple',
+    '1004': 'LG',
+    '0e8d': 'Mediatek',
+    '05c6': 'Qualcomm',
+    '1d4d': 'Xiaomi',
+    '1f3a': 'ODM'
+}
+
+# bDeviceClass values for HID, printer, hub and smart-card devices
+NON_PHONE_DEVICE_CLASSES = frozenset((0x03, 0x07, 0x09, 0x0B))
+
+# (vendor_id, product_id) -> mode name, for O(1) descriptor matching
+EMERGENCY_MODES = {
+    (0x05c6, 0x9008): 'Qualcomm EDL',
+    (0x0e8d, 0x2000): 'Mediatek Preloader',
+    (0x04e8, 0x685d): 'Samsung Download',
+    (0x1782, 0x4d00): 'Spreadtrum/Unisoc',
+    (0x1d4d, 0x0002): 'Xiaomi EDL'
+}
+
+BOOTLOADER_SIGNATURES = {
+    (0x18d1, 0xd001): 'Android Bootloader',
+    (0x18d1, 0x4ee0): 'Google Bootloader',
+    (0x04e8, 0x685d): 'Samsung Bootloader',
+    (0x1004, 0x6000): 'LG Bootloader',
+    (0x0bb4, 0x0ffe): 'HTC Bootloader'
+}
+
+# One udev observer per process, shared by every detector; each attach/detach bumps
+# the generation so detectors can tell whether their cached result is stale
+_hotplug_lock = threading.Lock()
+_hotplug_observer = None
+_bus_generation = 0
+
+def _start_hotplug_monitor() -> bool:
+    """Start the shared udev observer for USB attach/detach events (Linux only)"""
+    global _hotplug_observer
+    if pyudev is None or _SYSTEM != 'linux':
+        return False
+    
+    with _hotplug_lock:
+        if _hotplug_observer is not None:
+            return True
+        try:
+            context = pyudev.Context()
+            monitor = pyudev.Monitor.from_netlink(context)
+            monitor.filter_by('usb')
+            observer = pyudev.MonitorObserver(monitor, callback=_on_hotplug_event, name='usb-hotplug')
+            observer.daemon = True
+            observer.start()
+            _hotplug_observer = observer
+            return True
+        except Exception as e:
+            print(f"USB hotplug monitor unavailable, falling back to polling: {e}")
+            return False
+
+def _on_hotplug_event(device):
+    """Invalidate every detector's cached result on USB attach/detach"""
+    global _bus_generation
+    if device.action in ('add', 'remove'):
+        with _hotplug_lock:
+            _bus_generation += 1
+
 class UniversalUSBDetector:
     """Universal USB device detection that works with any connected phone"""
     
     def __init__(self):
-        self.system = platform.system().lower()
+        self.system = _SYSTEM
+        self._last_detection = None
+        self._last_detection_at = 0.0
+        self._last_detection_generation = None
+        self._hotplug = _start_hotplug_monitor()
+        self._adb_shells = {}
+        self._adb_device_locks = {}  # device ID -> lock held for a whole shell round trip
+        self._adb_lock = threading.Lock()  # guards both dicts
         self.detection_methods = [
             self._try_adb_detection,
             self._try_fastboot_detection,
@@ -21,14 +130,39 @@ class UniversalUSBDetector:
             self._try_emergency_modes,
             self._try_bootloader_modes
         ]
+        # Probes that read the pass's USB descriptor snapshot instead of walking the bus
+        self._descriptor_probes = (
+            self._try_raw_usb_communication,
+            self._try_emergency_modes,
+            self._try_bootloader_modes
+        )
     
     def detect_any_phone(self) -> Dict[str, Any]:
         """Try all detection methods to find any connected phone"""
+        # With hotplug notifications the bus only needs re-enumerating after attach/detach,
+        # or once the TTL lapses for state changes udev does not report
+        generation = _bus_generation
+        if (self._hotplug and self._last_detection is not None
+                and generation == self._last_detection_generation
+                and time.monotonic() - self._last_detection_at < DETECTION_CACHE_TTL):
+            return copy.deepcopy(self._last_detection)
+        
+        result = self._run_detection_methods()
+        self._last_detection = result
+        self._last_detection_at = time.monotonic()
+        self._last_detection_generation = generation
+        return copy.deepcopy(result)
+    
+    def _run_detection_methods(self) -> Dict[str, Any]:
+        """Run every detection method against the current USB bus"""
         results = []
+        # One descriptor snapshot per pass, taken on first use; it stays local so
+        # concurrent passes on a shared detector never see each other's bus walk
+        descriptors = functools.lru_cache(maxsize=None)(self._scan_usb_descriptors)
         
         for method in self.detection_methods:
             try:
-                result = method()
+                result = method(descriptors) if method in self._descriptor_probes else method()
                 if result and result.get('success'):
                     results.append(result)
                     # If we get a high-confidence detection, return it immediately
@@ -47,25 +181,26 @@ class UniversalUSBDetector:
         """Try ADB-based detection"""
         try:
             result = subprocess.run(['adb', 'devices'], capture_output=True, text=True, timeout=10)
-            lines = result.stdout.split('\n')[1:]  # Skip first line
             
             devices = []
-            for line in lines:
-                if line.strip() and 'device' in line and 'offline' not in line:
-                    device_id = line.split('\t')[0]
-                    
-                    # Get detailed device info
-                    model = self._get_adb_device_model(device_id)
-                    brand = self._get_adb_device_brand(device_id)
-                    android_version = self._get_adb_android_version(device_id)
-                    
-                    devices.append({
-                        'device_id': device_id,
-                        'model': model,
-                        'brand': brand,
-                        'android_version': android_version,
-                        'connection_type': 'adb'
-                    })
+            for match in ADB_DEVICE_LINE.finditer(result.stdout):
+                device_id = match.group(1)
+                
+                # Get detailed device info
+                model = self._get_adb_device_model(device_id)
+                brand = self._get_adb_device_brand(device_id)
+                android_version = self._get_adb_android_version(device_id)
+                
+                devices.append({
+                    'device_id': device_id,
+                    'model': model,
+                    'brand': brand,
+                    'android_version': android_version,
+                    'connection_type': 'adb'
+                })
+            
+            # Drop shells kept open for devices that have since disconnected
+            self.close_adb_shells(keep=[device['device_id'] for device in devices])
             
             if devices:
                 return {
@@ -86,14 +221,12 @@ class UniversalUSBDetector:
             result = subprocess.run(['fastboot', 'devices'], capture_output=True, text=True, timeout=10)
             
             devices = []
-            for line in result.stdout.split('\n'):
-                if line.strip():
-                    device_id = line.split('\t')[0]
-                    devices.append({
-                        'device_id': device_id,
-                        'connection_type': 'fastboot',
-                        'mode': 'bootloader'
-                    })
+            for match in FASTBOOT_LINE.finditer(result.stdout):
+                devices.append({
+                    'device_id': match.group(1),
+                    'connection_type': 'fastboot',
+                    'mode': 'bootloader'
+                })
             
             if devices:
                 return {
@@ -147,33 +280,27 @@ class UniversalUSBDetector:
         
         return {'success': False, 'method': 'system_enumeration'}
     
-    def _try_raw_usb_communication(self) -> Dict[str, Any]:
+    def _try_raw_usb_communication(self, descriptors: Callable[[], List[tuple]]) -> Dict[str, Any]:
         """Try raw USB communication to identify devices"""
         try:
             # This method attempts to communicate with any USB device
             # that might be a phone, even if it's not properly recognized
             
-            devices = usb.core.find(find_all=True)
             identified_devices = []
             
-            for dev in devices:
-                try:
-                    # Try to read device descriptor
-                    device_info = {
-                        'vendor_id': f'{dev.idVendor:04x}',
-                        'product_id': f'{dev.idProduct:04x}',
-                        'device_class': dev.bDeviceClass,
-                        'device_subclass': dev.bDeviceSubClass
-                    }
-                    
-                    # Try to identify based on USB characteristics
-                    identity = self._identify_by_usb_characteristics(device_info)
-                    if identity:
-                        device_info.update(identity)
-                        identified_devices.append(device_info)
-                        
-                except usb.core.USBError:
-                    continue
+            for vendor, product, device_class, device_subclass in descriptors():
+                device_info = {
+                    'vendor_id': f'{vendor:04x}',
+                    'product_id': f'{product:04x}',
+                    'device_class': device_class,
+                    'device_subclass': device_subclass
+                }
+                
+                # Try to identify based on USB characteristics
+                identity = self._identify_by_usb_characteristics(device_info)
+                if identity:
+                    device_info.update(identity)
+                    identified_devices.append(device_info)
             
             if identified_devices:
                 return {
@@ -188,32 +315,20 @@ class UniversalUSBDetector:
         
         return {'success': False, 'method': 'raw_usb'}
     
-    def _try_emergency_modes(self) -> Dict[str, Any]:
+    def _try_emergency_modes(self, descriptors: Callable[[], List[tuple]]) -> Dict[str, Any]:
         """Try to detect phones in emergency download modes"""
-        emergency_modes = [
-            ('Qualcomm EDL', '05c6', '9008'),
-            ('Mediatek Preloader', '0e8d', '2000'),
-            ('Samsung Download', '04e8', '685d'),
-            ('Spreadtrum/Unisoc', '1782', '4d00'),
-            ('Xiaomi EDL', '1d4d', '0002')
-        ]
-        
         try:
-            devices = usb.core.find(find_all=True)
             emergency_devices = []
             
-            for dev in devices:
-                vendor_id = f'{dev.idVendor:04x}'
-                product_id = f'{dev.idProduct:04x}'
-                
-                for mode_name, mode_vendor, mode_product in emergency_modes:
-                    if vendor_id == mode_vendor and product_id == mode_product:
-                        emergency_devices.append({
-                            'mode': mode_name,
-                            'vendor_id': vendor_id,
-                            'product_id': product_id,
-                            'connection_type': 'emergency_download'
-                        })
+            for vendor, product, _, _ in descriptors():
+                mode_name = EMERGENCY_MODES.get((vendor, product))
+                if mode_name:
+                    emergency_devices.append({
+                        'mode': mode_name,
+                        'vendor_id': f'{vendor:04x}',
+                        'product_id': f'{product:04x}',
+                        'connection_type': 'emergency_download'
+                    })
             
             if emergency_devices:
                 return {
@@ -228,32 +343,20 @@ class UniversalUSBDetector:
         
         return {'success': False, 'method': 'emergency_modes'}
     
-    def _try_bootloader_modes(self) -> Dict[str, Any]:
+    def _try_bootloader_modes(self, descriptors: Callable[[], List[tuple]]) -> Dict[str, Any]:
         """Try to detect phones in various bootloader modes"""
-        bootloader_signatures = [
-            ('Android Bootloader', '18d1', 'd001'),
-            ('Google Bootloader', '18d1', '4ee0'),
-            ('Samsung Bootloader', '04e8', '685d'),
-            ('LG Bootloader', '1004', '6000'),
-            ('HTC Bootloader', '0bb4', '0ffe')
-        ]
-        
         try:
-            devices = usb.core.find(find_all=True)
             bootloader_devices = []
             
-            for dev in devices:
-                vendor_id = f'{dev.idVendor:04x}'
-                product_id = f'{dev.idProduct:04x}'
-                
-                for bl_name, bl_vendor, bl_product in bootloader_signatures:
-                    if vendor_id == bl_vendor and product_id == bl_product:
-                        bootloader_devices.append({
-                            'mode': bl_name,
-                            'vendor_id': vendor_id,
-                            'product_id': product_id,
-                            'connection_type': 'bootloader'
-                        })
+            for vendor, product, _, _ in descriptors():
+                bl_name = BOOTLOADER_SIGNATURES.get((vendor, product))
+                if bl_name:
+                    bootloader_devices.append({
+                        'mode': bl_name,
+                        'vendor_id': f'{vendor:04x}',
+                        'product_id': f'{product:04x}',
+                        'connection_type': 'bootloader'
+                    })
             
             if bootloader_devices:
                 return {
@@ -268,37 +371,36 @@ class UniversalUSBDetector:
         
         return {'success': False, 'method': 'bootloader_modes'}
     
+    def _scan_usb_descriptors(self) -> List[tuple]:
+        """Walk the USB bus and return (vendor, product, class, subclass) tuples"""
+        descriptors = []
+        for dev in usb.core.find(find_all=True):
+            try:
+                descriptors.append((dev.idVendor, dev.idProduct, dev.bDeviceClass, dev.bDeviceSubClass))
+            except usb.core.USBError:
+                continue
+        
+        return descriptors
+    
     def _analyze_usb_device(self, dev) -> Dict[str, Any]:
         """Analyze USB device to determine if it's a phone"""
         vendor_id = f'{dev.idVendor:04x}'
         product_id = f'{dev.idProduct:04x}'
         
-        # Known phone vendor IDs
-        phone_vendors = {
-            '04e8': 'Samsung',
-            '0bb4': 'HTC',
-            '12d1': 'Huawei',
-            '18d1': 'Google',
-            '22d9': 'Oppo',
-            '2717': 'Xiaomi',
-            '1782': 'Hisense',
-            '05ac': 'Apple',
-            '1004': 'LG',
-            '0e8d': 'Mediatek',
-            '05c6': 'Qualcomm',
-            '1d4d': 'Xiaomi',
-            '1f3a': 'ODM'
-        }
-        
         device_info = {
             'vendor_id': vendor_id,
             'product_id': product_id,
-            'vendor_name': phone_vendors.get(vendor_id, 'Unknown'),
-            'is_phone': vendor_id in phone_vendors,
+            'vendor_name': PHONE_VENDORS.get(vendor_id, 'Unknown'),
+            'is_phone': vendor_id in PHONE_VENDORS,
             'device_class': dev.bDeviceClass,
             'device_subclass': dev.bDeviceSubClass
         }
         
+        # Hubs, HIDs, printers and card readers from other vendors are never phones;
+        # skip the string descriptor control transfers for them
+        if dev.bDeviceClass in NON_PHONE_DEVICE_CLASSES and not device_info['is_phone']:
+            return device_info
+        
         # Try to get more detailed information
         try:
             device_info['manufacturer'] = usb.util.get_string(dev, dev.iManufacturer)
@@ -345,20 +447,14 @@ class UniversalUSBDetector:
     def _get_adb_device_model(self, device_id: str) -> str:
         """Get device model via ADB"""
         try:
-            result = subprocess.run([
-                'adb', '-s', device_id, 'shell', 'getprop', 'ro.product.model'
-            ], capture_output=True, text=True, timeout=5)
-            return result.stdout.strip() or 'Unknown'
+            return self._adb_getprop(device_id, 'ro.product.model') or 'Unknown'
         except:
             return 'Unknown'
     
     def _get_adb_device_brand(self, device_id: str) -> str:
         """Get device brand via ADB"""
         try:
-            result = subprocess.run([
-                'adb', '-s', device_id, 'shell', 'getprop', 'ro.product.brand'
-            ], capture_output=True, text=True, timeout=5)
-            brand = result.stdout.strip()
+            brand = self._adb_getprop(device_id, 'ro.product.brand')
             return brand.capitalize() if brand else 'Unknown'
         except:
             return 'Unknown'
@@ -366,28 +462,84 @@ class UniversalUSBDetector:
     def _get_adb_android_version(self, device_id: str) -> str:
         """Get Android version via ADB"""
         try:
-            result = subprocess.run([
-                'adb', '-s', device_id, 'shell', 'getprop', 'ro.build.version.release'
-            ], capture_output=True, text=True, timeout=5)
-            return result.stdout.strip() or 'Unknown'
+            return self._adb_getprop(device_id, 'ro.build.version.release') or 'Unknown'
         except:
             return 'Unknown'
     
+    def _get_adb_shell(self, device_id: str) -> subprocess.Popen:
+        """Return a live `adb shell` session for the device, starting one if needed"""
+        with self._adb_lock:
+            shell = self._adb_shells.get(device_id)
+            if shell is None or shell.poll() is not None:
+                shell = subprocess.Popen(
+                    ['adb', '-s', device_id, 'shell'],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    text=True, bufsize=1
+                )
+                self._adb_shells[device_id] = shell
+            return shell
+    
+    def _adb_device_lock(self, device_id: str) -> threading.Lock:
+        """Lock serializing commands on one device's shell; kept for the detector's lifetime"""
+        with self._adb_lock:
+            return self._adb_device_locks.setdefault(device_id, threading.Lock())
+    
+    def _adb_getprop(self, device_id: str, prop: str, timeout: float = 5) -> str:
+        """Read a system property through the device's persistent adb shell"""
+        # Held from write to sentinel so concurrent queries cannot read each other's output
+        with self._adb_device_lock(device_id):
+            shell = self._get_adb_shell(device_id)
+            # A hung shell is killed; the next query then starts a fresh one
+            timer = threading.Timer(timeout, shell.kill)
+            timer.start()
+            try:
+                shell.stdin.write(f'getprop {prop}; echo {ADB_SHELL_SENTINEL}\n')
+                shell.stdin.flush()
+                
+                lines = []
+                for line in shell.stdout:
+                    line = line.strip()
+                    if line == ADB_SHELL_SENTINEL:
+                        break
+                    lines.append(line)
+                return '\n'.join(lines).strip()
+            finally:
+                timer.cancel()
+    
+    def close_adb_shells(self, keep: List[str] = ()):
+        """Terminate persistent adb shells, except those for device IDs in `keep`"""
+        with self._adb_lock:
+            device_ids = [d for d in self._adb_shells if d not in keep]
+        
+        for device_id in device_ids:
+            # Wait for any in-flight query on this shell before tearing it down
+            with self._adb_device_lock(device_id):
+                with self._adb_lock:
+                    shell = self._adb_shells.pop(device_id, None)
+                if shell is None:
+                    continue
+                try:
+                    shell.stdin.close()
+                    shell.terminate()
+                    shell.wait(timeout=2)
+                except Exception:
+                    shell.kill()
+    
+    def __del__(self):
+        try:
+            self.close_adb_shells()
+        except Exception:
+            pass
+    
     def _windows_usb_enumeration(self) -> Dict[str, Any]:
         """Windows-specific USB enumeration"""
         try:
-            result = subprocess.run([
+            lines = self._scan_command_output([
                 'powershell', 
                 'Get-PnpDevice -Class USB | Where-Object {$_.Status -eq "OK"} | Select-Object FriendlyName, DeviceID, Status'
-            ], capture_output=True, text=True, timeout=10)
+            ], WINDOWS_PHONE_KEYWORDS)
             
-            devices = []
-            for line in result.stdout.split('\n'):
-                if any(keyword in line for keyword in ['Android', 'ADB', 'Composite', 'Phone', 'Mobile']):
-                    devices.append({
-                        'name': line.strip(),
-                        'connection_type': 'windows_pnp'
-                    })
+            devices = [{'name': line, 'connection_type': 'windows_pnp'} for line in lines]
             
             if devices:
                 return {
@@ -405,15 +557,9 @@ class UniversalUSBDetector:
     def _linux_usb_enumeration(self) -> Dict[str, Any]:
         """Linux-specific USB enumeration"""
         try:
-            result = subprocess.run(['lsusb'], capture_output=True, text=True, timeout=10)
+            lines = self._scan_command_output(['lsusb'], LINUX_PHONE_KEYWORDS)
             
-            devices = []
-            for line in result.stdout.split('\n'):
-                if any(keyword in line.lower() for keyword in ['android', 'google', 'samsung', 'huawei', 'xiaomi', 'oppo', 'hisense']):
-                    devices.append({
-                        'info': line.strip(),
-                        'connection_type': 'linux_lsusb'
-                    })
+            devices = [{'info': line, 'connection_type': 'linux_lsusb'} for line in lines]
             
             if devices:
                 return {
@@ -431,17 +577,11 @@ class UniversalUSBDetector:
     def _macos_usb_enumeration(self) -> Dict[str, Any]:
         """macOS-specific USB enumeration"""
         try:
-            result = subprocess.run([
+            lines = self._scan_command_output([
                 'system_profiler', 'SPUSBDataType'
-            ], capture_output=True, text=True, timeout=10)
+            ], MACOS_PHONE_KEYWORDS)
             
-            devices = []
-            for line in result.stdout.split('\n'):
-                if any(keyword in line for keyword in ['iPhone', 'iPad', 'Android']):
-                    devices.append({
-                        'info': line.strip(),
-                        'connection_type': 'macos_system_profiler'
-                    })
+            devices = [{'info': line, 'connection_type': 'macos_system_profiler'} for line in lines]
             
             if devices:
                 return {
@@ -456,6 +596,27 @@ class UniversalUSBDetector:
         
         return {'success': False, 'method': 'macos_enumeration'}
     
+    def _scan_command_output(self, command: List[str], pattern: re.Pattern, timeout: float = 10) -> List[str]:
+        """Stream command output and collect matching lines, stopping early once enough are found"""
+        matches = []
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                if pattern.search(line):
+                    matches.append(line.strip())
+                    if len(matches) >= MAX_ENUMERATED_DEVICES:
+                        break
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.terminate()
+            proc.stdout.close()
+            proc.wait()
+        
+        return matches
+    
     def _merge_detection_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Merge multiple detection results"""
         if not results:
@@ -512,10 +673,22 @@ class UniversalUSBDetector:
             'suggestion': 'Check USB connection and try different USB ports'
         }
     
-    def force_device_recognition(self, vendor_id: str, product_id: str) -> Dict[str, Any]:
-        """Force recognition of a specific USB device"""
+    def list_usb_devices(self) -> List[Any]:
+        """Enumerate every device on the USB bus once"""
+        return list(usb.core.find(find_all=True))
+    
+    def force_device_recognition(self, vendor_id: str, product_id: str, devices: List[Any] = None) -> Dict[str, Any]:
+        """Force recognition of a specific USB device
+        
+        `devices` may be a list from list_usb_devices() so several recognitions
+        can share one bus enumeration.
+        """
         try:
-            dev = usb.core.find(idVendor=int(vendor_id, 16), idProduct=int(product_id, 16))
+            vendor, product = int(vendor_id, 16), int(product_id, 16)
+            if devices is None:
+                dev = usb.core.find(idVendor=vendor, idProduct=product)
+            else:
+                dev = next((d for d in devices if d.idVendor == vendor and d.idProduct == product), None)
             if dev:
                 device_info = self._analyze_usb_device(dev)
                 
@@ -1,25 +1,152 @@
 import subprocess
 import platform
-from typing import Dict, List, Any
-from .universal_usb_detector import UniversalUSBDetector
+import asyncio
+import copy
+import locale
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Dict, List, Any, Iterable, Sequence, Tuple
+from functools import lru_cache
+from .universal_usb_detector import UniversalUSBDetector, MACOS_PHONE_KEYWORDS
+
+# Host OS, resolved once per process
+_SYSTEM = platform.system().lower()
+
+# Encoding of the fallback commands' output; what text=True decoding used (the ANSI codepage on Windows)
+_OUTPUT_ENCODING = locale.getpreferredencoding(False)
+
+# Static help content, built once at import; read-only, with tuple values
+DETECTION_HELP = MappingProxyType({
+    'universal_methods': (
+        'ADB detection - requires USB debugging',
+        'Fastboot detection - for bootloader mode',
+        'Emergency mode detection - download/EDL modes',
+        'USB raw detection - works with any USB device',
+        'System enumeration - OS-specific detection'
+    ),
+    'troubleshooting': (
+        'Try different USB cables',
+        'Check device manager for unknown devices',
+        'Enable USB debugging on Android',
+        'Install universal ADB drivers',
+        'Try different USB ports',
+        'Restart device and computer'
+    ),
+    'emergency_modes': (
+        'Samsung: Volume Down + Home + Power',
+        'Most Android: Volume Down + Power',
+        'Mediatek: Volume Up + Power (or test points)',
+        'Qualcomm: Volume Up + Power (or EDL cable)'
+    )
+})
+
+# Shared by all handlers: runs the universal detector and the OS fallback side by side
+_DETECTION_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='usb-detect')
+
+# Reliability adjustment per connection quality
+QUALITY_BONUS = {
+    'excellent': 0.2,
+    'good': 0.1,
+    'fair': 0.0,
+    'poor': -0.1
+}
+
+class _RecognitionBatcher:
+    """Coalesces forced recognitions arriving within a short window into one USB enumeration"""
+    
+    def __init__(self, detector: UniversalUSBDetector, max_size: int = 16, timeout: float = 0.02):
+        self.detector = detector
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+    
+    def submit(self, vendor_id: str, product_id: str) -> Dict[str, Any]:
+        """Queue a recognition and block until its batch has run"""
+        future = Future()
+        batch = None
+        
+        with self._lock:
+            self._pending.append(((vendor_id, product_id), future))
+            if len(self._pending) >= self.max_size:
+                batch = self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.timeout, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        
+        if batch:
+            self._run(batch)
+        return future.result()
+    
+    def _take_batch(self) -> List[tuple]:
+        """Detach the pending requests; caller must hold the lock"""
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+    
+    def _flush(self):
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self._run(batch)
+    
+    def _run(self, batch: List[tuple]):
+        try:
+            devices = self.detector.list_usb_devices()
+        except Exception:
+            devices = None  # each recognition falls back to its own lookup
+        
+        results = {}
+        for key, future in batch:
+            try:
+                if key not in results:
+                    results[key] = self.detector.force_device_recognition(*key, devices=devices)
+                future.set_result(copy.deepcopy(results[key]))
+            except Exception as e:
+                future.set_exception(e)
 
 class USBHandler:
     """Enhanced USB handler with universal device detection"""
     
     def __init__(self):
-        self.system = platform.system().lower()
+        self.system = _SYSTEM
         self.universal_detector = UniversalUSBDetector()
+        # (monotonic timestamp, result) of the last enumeration
+        self._cache = None
+        self._cache_ttl = 3.0
+        self._recognition_batcher = _RecognitionBatcher(self.universal_detector)
     
     def detect_connected_device(self) -> Dict[str, Any]:
         """Detect any connected phone using universal methods"""
+        if self._cache and time.monotonic() - self._cache[0] < self._cache_ttl:
+            return copy.deepcopy(self._cache[1])
+        
+        # Run the OS fallback alongside the universal detector so a failed
+        # universal pass doesn't have to wait for the fallback subprocess
+        cancel_fallback = threading.Event()
         try:
-            # Use universal detector first
-            result = self.universal_detector.detect_any_phone()
+            universal_future = _DETECTION_POOL.submit(self.universal_detector.detect_any_phone)
+            fallback_future = _DETECTION_POOL.submit(self._fallback_detection, cancel_fallback)
+            
+            # Universal detection is preferred whenever it succeeds
+            result = universal_future.result()
             
             if result.get('success'):
-                return self._enhance_detection_result(result)
+                # Stops the fallback command if it is already running
+                cancel_fallback.set()
+                result = self._enhance_detection_result(result)
             else:
-                return self._fallback_detection()
+                result = fallback_future.result()
+            
+            self._cache = (time.monotonic(), result)
+            return copy.deepcopy(result)
                 
         except Exception as e:
             return {
@@ -27,215 +154,147 @@ class USBHandler:
                 'error': str(e),
                 'method': 'error_fallback'
             }
+        finally:
+            cancel_fallback.set()
+    
+    async def detect_connected_device_async(self) -> Dict[str, Any]:
+        """Async variant of detect_connected_device for callers running an event loop"""
+        if self._cache and time.monotonic() - self._cache[0] < self._cache_ttl:
+            return copy.deepcopy(self._cache[1])
+        
+        fallback_task = asyncio.ensure_future(self._fallback_detection_async())
+        try:
+            result = await asyncio.to_thread(self.universal_detector.detect_any_phone)
+            
+            if result.get('success'):
+                fallback_task.cancel()
+                result = self._enhance_detection_result(result)
+            else:
+                result = await fallback_task
+            
+            self._cache = (time.monotonic(), result)
+            return copy.deepcopy(result)
+                
+        except Exception as e:
+            fallback_task.cancel()
+            return {
+                'success': False,
+                'error': str(e),
+                'method': 'error_fallback'
+            }
     
     def detect_specific_device(self, vendor_id: str, product_id: str) -> Dict[str, Any]:
         """Force detection of specific USB device"""
-        return self.universal_detector.force_device_recognition(vendor_id, product_id)
+        self.invalidate_cache()
+        return self._recognition_batcher.submit(vendor_id, product_id)
+    
+    def invalidate_cache(self):
+        """Discard the cached detection result so the next call re-enumerates"""
+        self._cache = None
     
     def get_detection_help(self) -> Dict[str, Any]:
         """Get help for device detection"""
-        return {
-            'universal_methods': [
-                'ADB detection - requires USB debugging',
-                'Fastboot detection - for bootloader mode',
-                'Emergency mode detection - download/EDL modes',
-                'USB raw detection - works with any USB device',
-                'System enumeration - OS-specific detection'
-            ],
-            'troubleshooting': [
-                'Try different USB cables',
-                'Check device manager for unknown devices',
-                'Enable USB debugging on Android',
-                'Install universal ADB drivers',
-                'Try different USB ports',
-                'Restart device and computer'
-            ],
-            'emergency_modes': [
-                'Samsung: Volume Down + Home + Power',
-                'Most Android: Volume Down + Power',
-                'Mediatek: Volume Up + Power (or test points)',
-                'Qualcomm: Volume Up + Power (or EDL cable)'
-            ]
-        }
+        # A fresh top-level dict per caller; the tuples inside are immutable
+        return dict(DETECTION_HELP)
     
     def _enhance_detection_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """Enhance detection result with additional information"""
         if not result.get('success'):
             return result
         
-        primary_device = result.get('primary_device', {})
+        primary_device = result.get('primary_device') or {}
+        confidence = result.get('confidence', 0)
+        methods = result.get('detection_methods') or ()
         
         # Add connection quality assessment
         connection_quality = self._assess_connection_quality(primary_device)
         result['connection_quality'] = connection_quality
         
         # Add detection reliability score
-        reliability = self._calculate_reliability(result)
+        reliability = self._calculate_reliability(confidence, methods, connection_quality)
         result['reliability_score'] = reliability
         
         # Add suggestions for improvement
         if reliability < 0.7:
-            result['improvement_suggestions'] = self._get_improvement_suggestions(primary_device)
+            result['improvement_suggestions'] = list(self._get_improvement_suggestions(primary_device))
         
         return result
     
     def _assess_connection_quality(self, device_info: Dict[str, Any]) -> str:
         """Assess the quality of USB connection"""
-        connection_type = device_info.get('connection_type', '')
-        
-        if any(mode in connection_type for mode in ['adb', 'fastboot', 'emergency']):
-            return 'excellent'
-        elif 'bootloader' in connection_type:
-            return 'good'
-        elif 'usb' in connection_type:
-            return 'fair'
-        else:
-            return 'poor'
-    
-    def _calculate_reliability(self, result: Dict[str, Any]) -> float:
+        return _connection_quality(device_info.get('connection_type', ''))
+    
+    def _calculate_reliability(self, confidence: float, methods: Sequence[str], connection_quality: str) -> float:
         """Calculate reliability score for detection"""
-        confidence = result.get('confidence', 0)
-        methods_used = len(result.get('detection_methods', []))
-        connection_quality = result.get('connection_quality', 'poor')
-        
         # Base reliability on confidence
         reliability = confidence
         
         # Bonus for multiple detection methods
-        if methods_used > 1:
+        if len(methods) > 1:
             reliability += 0.1
         
         # Adjust based on connection quality
-        quality_bonus = {
-            'excellent': 0.2,
-            'good': 0.1,
-            'fair': 0.0,
-            'poor': -0.1
-        }
-        reliability += quality_bonus.get(connection_quality, 0)
+        reliability += QUALITY_BONUS.get(connection_quality, 0)
         
         return min(1.0, max(0.0, reliability))
     
-    def _get_improvement_suggestions(self, device_info: Dict[str, Any]) -> List[str]:
+    def _get_improvement_suggestions(self, device_info: Dict[str, Any]) -> Tuple[str, ...]:
         """Get suggestions to improve detection"""
-        suggestions = []
-        connection_type = device_info.get('connection_type', '')
-        
-        if 'unknown' in connection_type:
-            suggestions.extend([
-                "Install device-specific drivers",
-                "Try universal ADB drivers",
-                "Check if device is in correct mode"
-            ])
-        
-        if 'usb' in connection_type and 'adb' not in connection_type:
-            suggestions.extend([
-                "Enable USB debugging on device",
-                "Change USB connection mode to File Transfer",
-                "Try different USB cable"
-            ])
-        
-        if not suggestions:
-            suggestions.append("Try universal detection mode for better results")
-        
-        return suggestions
-    
-    def _fallback_detection(self) -> Dict[str, Any]:
-        """Fallback when universal detection fails"""
+        return _improvement_suggestions(device_info.get('connection_type', ''))
+    
+    def _fallback_detection(self, cancel: threading.Event = None) -> Dict[str, Any]:
+        """Fallback when universal detection fails; setting `cancel` terminates the command"""
         # Try traditional methods as fallback
+        spec = FALLBACK_SPECS.get(self.system)
+        if spec is None or (cancel is not None and cancel.is_set()):
+            return self._generic_fallback()
+        
         try:
-            if self.system == 'windows':
-                return self._windows_fallback()
-            elif self.system == 'linux':
-                return self._linux_fallback()
-            elif self.system == 'darwin':
-                return self._macos_fallback()
-            else:
-                return self._generic_fallback()
+            # Output stays bytes; collectors decode only the lines they keep
+            with subprocess.Popen(spec['command'], stdout=subprocess.PIPE) as proc:
+                if cancel is not None:
+                    threading.Thread(target=_terminate_on_cancel, args=(cancel, proc), daemon=True).start()
+                devices = spec['collect'](proc.stdout)
+                # Collectors may stop reading early; don't wait on the rest of the output
+                if proc.poll() is None:
+                    proc.terminate()
+            return self._fallback_result(spec, devices)
         except Exception as e:
             return self._generic_fallback()
     
-    def _windows_fallback(self) -> Dict[str, Any]:
-        """Windows fallback detection"""
-        try:
-            result = subprocess.run([
-                'powershell', 
-                'Get-PnpDevice -Class USB | Where-Object {$_.Status -eq "OK"} | Select-Object FriendlyName, DeviceID'
-            ], capture_output=True, text=True)
-            
-            devices = []
-            for line in result.stdout.split('\n'):
-                if line.strip() and not line.startswith('FriendlyName'):
-                    devices.append(line.strip())
-            
-            if devices:
-                return {
-                    'success': True,
-                    'method': 'windows_fallback',
-                    'devices_found': len(devices),
-                    'device_list': devices,
-                    'confidence': 0.4,
-                    'note': 'USB devices detected but not specifically identified as phones'
-                }
-        except:
-            pass
-        
-        return self._generic_fallback()
-    
-    def _linux_fallback(self) -> Dict[str, Any]:
-        """Linux fallback detection"""
-        try:
-            result = subprocess.run(['lsusb'], capture_output=True, text=True)
-            
-            devices = []
-            for line in result.stdout.split('\n'):
-                if line.strip():
-                    devices.append(line.strip())
-            
-            if devices:
-                return {
-                    'success': True,
-                    'method': 'linux_fallback',
-                    'devices_found': len(devices),
-                    'device_list': devices,
-                    'confidence': 0.5,
-                    'note': 'USB devices detected via lsusb'
-                }
-        except:
-            pass
-        
-        return self._generic_fallback()
-    
-    def _macos_fallback(self) -> Dict[str, Any]:
-        """macOS fallback detection"""
+    async def _fallback_detection_async(self) -> Dict[str, Any]:
+        """Fallback detection on the event loop instead of a blocked worker thread"""
+        spec = FALLBACK_SPECS.get(self.system)
+        if spec is None:
+            return self._generic_fallback()
+        
+        proc = None
         try:
-            result = subprocess.run([
-                'system_profiler', 'SPUSBDataType'
-            ], capture_output=True, text=True)
-            
-            devices = []
-            in_phone_section = False
-            for line in result.stdout.split('\n'):
-                if 'iPhone' in line or 'iPad' in line or 'Android' in line:
-                    in_phone_section = True
-                if in_phone_section and line.strip():
-                    devices.append(line.strip())
-                    if line.startswith('          '):  # End of device section
-                        in_phone_section = False
-            
-            if devices:
-                return {
-                    'success': True,
-                    'method': 'macos_fallback',
-                    'devices_found': len(devices),
-                    'device_list': devices,
-                    'confidence': 0.6,
-                    'note': 'Possible phone devices detected'
-                }
-        except:
-            pass
-        
-        return self._generic_fallback()
+            proc = await asyncio.create_subprocess_exec(*spec['command'], stdout=asyncio.subprocess.PIPE)
+            stdout, _ = await proc.communicate()
+            devices = spec['collect'](stdout.splitlines(keepends=True))
+            return self._fallback_result(spec, devices)
+        except asyncio.CancelledError:
+            # Cancelling communicate() leaves the child running; don't orphan it
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+            raise
+        except Exception as e:
+            return self._generic_fallback()
+    
+    def _fallback_result(self, spec: Dict[str, Any], devices: List[str]) -> Dict[str, Any]:
+        """Build the fallback response for the devices a platform command listed"""
+        if not devices:
+            return self._generic_fallback()
+        
+        return {
+            'success': True,
+            'method': spec['method'],
+            'devices_found': len(devices),
+            'device_list': devices,
+            'confidence': spec['confidence'],
+            'note': spec['note']
+        }
     
     def _generic_fallback(self) -> Dict[str, Any]:
         """Generic fallback when all detection fails"""
@@ -252,3 +311,109 @@ class USBHandler:
             ],
             'emergency_help': 'Use manual device selection if automatic detection fails'
         }
+
+def _decode_line(line: bytes) -> str:
+    return line.strip().decode(_OUTPUT_ENCODING, 'replace')
+
+def _terminate_on_cancel(cancel: threading.Event, proc: subprocess.Popen):
+    """Terminate a fallback command once detection no longer needs its output"""
+    cancel.wait()
+    if proc.poll() is None:
+        proc.terminate()
+
+def _collect_windows_devices(lines: Iterable[bytes]) -> List[str]:
+    """Every non-header row of Get-PnpDevice output"""
+    devices = []
+    for line in lines:
+        if line.strip() and not line.startswith(b'FriendlyName'):
+            devices.append(_decode_line(line))
+    return devices
+
+def _collect_linux_devices(lines: Iterable[bytes]) -> List[str]:
+    """Every non-empty lsusb row"""
+    devices = []
+    for line in lines:
+        if line.strip():
+            devices.append(_decode_line(line))
+    return devices
+
+def _collect_macos_devices(lines: Iterable[bytes]) -> List[str]:
+    """The first phone section of system_profiler output"""
+    devices = []
+    in_phone_section = False
+    for line in lines:
+        if MACOS_PHONE_LINE.search(line):
+            in_phone_section = True
+        if in_phone_section and line.strip():
+            devices.append(_decode_line(line))
+            if line.startswith(b'          '):  # End of device section
+                # The rest of the USB tree isn't needed once a device is captured
+                break
+    return devices
+
+# Same keywords as the detector's str pattern, for matching raw output bytes
+MACOS_PHONE_LINE = re.compile(MACOS_PHONE_KEYWORDS.pattern.encode())
+
+# Per-platform fallback command, output collector and result metadata
+FALLBACK_SPECS = {
+    'windows': {
+        'command': [
+            'powershell', 
+            'Get-PnpDevice -Class USB | Where-Object {$_.Status -eq "OK"} | Select-Object FriendlyName, DeviceID'
+        ],
+        'collect': _collect_windows_devices,
+        'method': 'windows_fallback',
+        'confidence': 0.4,
+        'note': 'USB devices detected but not specifically identified as phones'
+    },
+    'linux': {
+        'command': ['lsusb'],
+        'collect': _collect_linux_devices,
+        'method': 'linux_fallback',
+        'confidence': 0.5,
+        'note': 'USB devices detected via lsusb'
+    },
+    'darwin': {
+        'command': ['system_profiler', 'SPUSBDataType'],
+        'collect': _collect_macos_devices,
+        'method': 'macos_fallback',
+        'confidence': 0.6,
+        'note': 'Possible phone devices detected'
+    }
+}
+
+@lru_cache(maxsize=32)
+def _connection_quality(connection_type: str) -> str:
+    """Connection types form a small fixed set, so each is classified only once"""
+    if any(mode in connection_type for mode in ['adb', 'fastboot', 'emergency']):
+        return 'excellent'
+    elif 'bootloader' in connection_type:
+        return 'good'
+    elif 'usb' in connection_type:
+        return 'fair'
+    else:
+        return 'poor'
+
+@lru_cache(maxsize=32)
+def _improvement_suggestions(connection_type: str) -> Tuple[str, ...]:
+    """Suggestions depend only on the connection type, so they are memoized"""
+    suggestions = []
+    
+    if 'unknown' in connection_type:
+        suggestions.extend([
+            "Install device-specific drivers",
+            "Try universal ADB drivers",
+            "Check if device is in correct mode"
+        ])
+    
+    if 'usb' in connection_type and 'adb' not in connection_type:
+        suggestions.extend([
+            "Enable USB debugging on device",
+            "Change USB connection mode to File Transfer",
+            "Try different USB cable"
+        ])
+    
+    if not suggestions:
+        suggestions.append("Try universal detection mode for better results")
+    
+    return tuple(suggestions)
@@ -1,12 +1,79 @@
 import sqlite3
-import json
+import os
+import threading
 from datetime import datetime
 
+DB_PATH = 'database/phone_database.db'
+
+_connections = threading.local()
+
+# Columns identifying each seed row; backed by a unique index per table
+SEED_KEYS = {
+    'phones': ('brand', 'model_number'),
+    'hisense_devices': ('model',),
+    'universal_detection_patterns': ('pattern_type', 'description'),
+    'hisense_unlock_methods': ('model', 'lock_type', 'method_name')
+}
+
+def _seed_rows(cursor: sqlite3.Cursor, table: str, columns: tuple, rows: list):
+    """Insert missing seed rows and update only the ones whose data changed.
+    
+    Unchanged rows are left untouched. Unlike INSERT OR REPLACE or an upsert,
+    this never allocates a new AUTOINCREMENT id for a row that already exists.
+    """
+    keys = SEED_KEYS[table]
+    key_positions = [columns.index(column) for column in keys]
+    value_positions = [i for i, column in enumerate(columns) if column not in keys]
+    key_match = ' AND '.join(f'{column} = ?' for column in keys)
+    values = [columns[i] for i in value_positions]
+    
+    cursor.executemany(f'''
+        UPDATE {table} SET {', '.join(f'{column} = ?' for column in values)}
+        WHERE {key_match} AND ({', '.join(values)}) IS NOT ({', '.join('?' for _ in values)})
+    ''', [
+        [row[i] for i in value_positions] + [row[i] for i in key_positions] + [row[i] for i in value_positions]
+        for row in rows
+    ])
+    
+    cursor.executemany(f'''
+        INSERT INTO {table} ({', '.join(columns)})
+        SELECT {', '.join('?' for _ in columns)}
+        WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {key_match})
+    ''', [list(row) + [row[i] for i in key_positions] for row in rows])
+
+def get_connection(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Return this thread's long-lived connection to the database.
+    
+    Connections are opened once per thread and path and never closed, so
+    callers skip the connect/header/WAL setup on every query. They run in
+    autocommit mode; use an explicit BEGIN for multi-statement writes.
+    """
+    cache = _connections.__dict__.setdefault('by_path', {})
+    key = os.path.abspath(db_path)
+    conn = cache.get(key)
+    if conn is None:
+        conn = sqlite3.connect(db_path, isolation_level=None, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        cache[key] = conn
+    return conn
+
 def init_database():
     """Initialize database with all phone models"""
-    conn = sqlite3.connect('database/phone_database.db')
+    conn = get_connection()
     cursor = conn.cursor()
     
+    # Older databases stored USB IDs as hex TEXT; phones is fully re-seeded
+    # below, so rebuild it with INTEGER ID columns
+    phone_columns = {row[1]: row[2] for row in cursor.execute('PRAGMA table_info(phones)')}
+    if phone_columns.get('vendor_id') == 'TEXT':
+        cursor.execute('DROP TABLE phones')
+    
+    # Likewise detection patterns used to be JSON text rather than raw bytes
+    pattern_columns = {row[1] for row in cursor.execute('PRAGMA table_info(universal_detection_patterns)')}
+    if 'pattern_data' in pattern_columns:
+        cursor.execute('DROP TABLE universal_detection_patterns')
+    
     # Create tables
     cursor.executescript('''
         CREATE TABLE IF NOT EXISTS phones (
@@ -17,12 +84,16 @@ def init_database():
             android_version TEXT,
             supported_locks TEXT,
             notes TEXT,
-            vendor_id TEXT,
-            product_id TEXT,
+            vendor_id INTEGER,
+            product_id INTEGER,
             detection_priority INTEGER DEFAULT 1,
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         );
         
+        CREATE INDEX IF NOT EXISTS idx_phones_vp ON phones(vendor_id, product_id);
+        CREATE INDEX IF NOT EXISTS idx_phones_priority ON phones(detection_priority);
+        CREATE INDEX IF NOT EXISTS idx_phones_prio1 ON phones(vendor_id, product_id) WHERE detection_priority = 1;
+        
         CREATE TABLE IF NOT EXISTS hisense_devices (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             model TEXT NOT NULL UNIQUE,
@@ -37,13 +108,43 @@ def init_database():
         CREATE TABLE IF NOT EXISTS universal_detection_patterns (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             pattern_type TEXT NOT NULL,
-            pattern_data TEXT,
+            pattern_bytes BLOB NOT NULL,
+            offset INTEGER NOT NULL DEFAULT 0,
             description TEXT,
             confidence_level REAL DEFAULT 0.7,
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         );
+
+        CREATE TABLE IF NOT EXISTS hisense_unlock_methods (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            model TEXT NOT NULL,
+            lock_type TEXT NOT NULL,
+            method_name TEXT NOT NULL,
+            tools_required TEXT,
+            steps TEXT,
+            success_rate REAL,
+            data_loss TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
     ''')
     
+    # Natural keys for the seed upserts. Earlier runs could leave duplicate
+    # rows behind, so keep the oldest copy before adding each unique index.
+    for table, key_columns in SEED_KEYS.items():
+        columns = ', '.join(key_columns)
+        # Rows with a NULL key never collide under the unique index, so leave them alone
+        not_null = ' AND '.join(f'{column} IS NOT NULL' for column in key_columns)
+        cursor.execute(f'''
+            DELETE FROM {table}
+            WHERE {not_null}
+              AND id NOT IN (SELECT MIN(id) FROM {table} WHERE {not_null} GROUP BY {columns})
+        ''')
+        cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS uq_{table}_seed ON {table}({columns})')
+    conn.commit()
+    
+    # Load all seed data in a single transaction
+    cursor.execute("BEGIN")
+    
     # Insert Hisense devices
     hisense_devices = [
         ('HLTE230E', 'Unisoc SC9863A', '["10"]', 
@@ -57,12 +158,9 @@ def init_database():
          'TP301,TP302', 'Volume Down + Power')
     ]
     
-    for device in hisense_devices:
-        cursor.execute('''
-            INSERT OR REPLACE INTO hisense_devices 
-            (model, chipset, android_versions, special_instructions, test_points, download_mode_combo)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', device)
+    _seed_rows(cursor, 'hisense_devices', (
+        'model', 'chipset', 'android_versions', 'special_instructions', 'test_points', 'download_mode_combo'
+    ), hisense_devices)
     
     # Insert all phones into main phones table
     all_phones = [
@@ -116,93 +214,76 @@ def init_database():
         
         # Apple devices
         ('Apple', 'iPhone 13', 'A2483', '15',
-         '["icloud", "screen_lock"]', '05ac', '12a8', 1),
+         '["icloud", "screen_lock"]', None, '05ac', '12a8', 1),
         
         # Xiaomi devices
         ('Xiaomi', 'Redmi Note 10', 'M2101K7AG', '11',
-         '["frp", "bootloader", "screen_lock"]', '2717', 'ff40', 1)
+         '["frp", "bootloader", "screen_lock"]', None, '2717', 'ff40', 1)
     ]
     
-    for phone in all_phones:
-        cursor.execute('''
-            INSERT OR REPLACE INTO phones 
-            (brand, model, model_number, android_version, supported_locks, notes, vendor_id, product_id, detection_priority)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', phone)
+    # USB IDs are listed in their usual hex form but stored as integers
+    all_phones = [
+        (*phone[:6], int(phone[6], 16), int(phone[7], 16), phone[8])
+        for phone in all_phones
+    ]
+    
+    _seed_rows(cursor, 'phones', (
+        'brand', 'model', 'model_number', 'android_version', 'supported_locks', 'notes',
+        'vendor_id', 'product_id', 'detection_priority'
+    ), all_phones)
     
     # Insert universal detection patterns
     universal_patterns = [
-        ('usb_handshake', '{"pattern": "55 53 42 43", "offset": 0}', 'USB control transfer signature'),
-        ('adb_protocol', '{"pattern": "48 45 4c 4c 4f", "offset": 0}', 'ADB hello protocol'),
-        ('fastboot_protocol', '{"pattern": "46 41 53 54 42 4f 4f 54", "offset": 0}', 'Fastboot protocol signature'),
-        ('mtk_preloader', '{"pattern": "4D 4D 4D 01", "offset": 0}', 'Mediatek preloader mode'),
-        ('qualcomm_edl', '{"pattern": "51 43 4F 4D 20 42 4F 4F 54 20 4C 4F 41 44 45 52", "offset": 0}', 'Qualcomm EDL mode'),
-        ('samsung_download', '{"pattern": "53 41 4D 53 55 4E 47 20 4D 53 4D 20 54 4F 4F 4C 53", "offset": 0}', 'Samsung download mode'),
-        ('spreadtrum_sci', '{"pattern": "53 50 52 44 42 4F 4F 54", "offset": 0}', 'Spreadtrum/Unisoc SCI mode')
+        ('usb_handshake', '55 53 42 43', 0, 'USB control transfer signature'),
+        ('adb_protocol', '48 45 4c 4c 4f', 0, 'ADB hello protocol'),
+        ('fastboot_protocol', '46 41 53 54 42 4f 4f 54', 0, 'Fastboot protocol signature'),
+        ('mtk_preloader', '4D 4D 4D 01', 0, 'Mediatek preloader mode'),
+        ('qualcomm_edl', '51 43 4F 4D 20 42 4F 4F 54 20 4C 4F 41 44 45 52', 0, 'Qualcomm EDL mode'),
+        ('samsung_download', '53 41 4D 53 55 4E 47 20 4D 53 4D 20 54 4F 4F 4C 53', 0, 'Samsung download mode'),
+        ('spreadtrum_sci', '53 50 52 44 42 4F 4F 54', 0, 'Spreadtrum/Unisoc SCI mode')
     ]
     
-    for pattern in universal_patterns:
-        cursor.execute('''
-            INSERT OR REPLACE INTO universal_detection_patterns 
-            (pattern_type, pattern_data, description, confidence_level)
-            VALUES (?, ?, ?, ?)
-        ''', pattern)
+    # Signatures are stored decoded so consumers never parse hex at runtime
+    universal_patterns = [
+        (pattern_type, bytes.fromhex(signature), offset, description)
+        for pattern_type, signature, offset, description in universal_patterns
+    ]
     
-    # Insert Hisense-specific unlock methods
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS hisense_unlock_methods (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            model TEXT NOT NULL,
-            lock_type TEXT NOT NULL,
-            method_name TEXT NOT NULL,
-            tools_required TEXT,
-            steps TEXT,
-            success_rate REAL,
-            data_loss TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    _seed_rows(cursor, 'universal_detection_patterns', (
+        'pattern_type', 'pattern_bytes', 'offset', 'description'
+    ), universal_patterns)
     
+    # Insert Hisense-specific unlock methods
     h40_methods = [
         ('HLTE230E', 'frp', 'Combination File Method', 
          '["Hisense_Tool_v2.3", "Octoplus"]',
-         json.dumps([
-             "Download combination firmware for HLTE230E",
-             "Enter Download mode (Volume Down + Power)",
-             "Flash combination firmware",
-             "Access hidden menu (*#*#3646633#*#*)",
-             "Reset FRP protection",
-             "Flash stock firmware"
-         ]), 0.85, 'complete'),
+         '["Download combination firmware for HLTE230E", '
+         '"Enter Download mode (Volume Down + Power)", '
+         '"Flash combination firmware", '
+         '"Access hidden menu (*#*#3646633#*#*)", '
+         '"Reset FRP protection", '
+         '"Flash stock firmware"]', 0.85, 'complete'),
         
         ('HLTE230E', 'screen_lock', 'Firmware Flash Method',
          '["Hisense_Tool_v2.3", "Odin"]',
-         json.dumps([
-             "Download stock firmware for HLTE230E",
-             "Enter Download mode",
-             "Flash complete firmware package",
-             "Wait for automatic reboot"
-         ]), 0.95, 'complete'),
+         '["Download stock firmware for HLTE230E", '
+         '"Enter Download mode", '
+         '"Flash complete firmware package", '
+         '"Wait for automatic reboot"]', 0.95, 'complete'),
         
         ('HLTE230E', 'google_account', 'Factory Reset Method',
          '["Hisense_Tool_v2.3"]',
-         json.dumps([
-             "Boot to recovery mode (Volume Up + Power)",
-             "Perform factory reset",
-             "Skip Google account setup",
-             "Use test points if recovery inaccessible"
-         ]), 0.7, 'complete')
+         '["Boot to recovery mode (Volume Up + Power)", '
+         '"Perform factory reset", '
+         '"Skip Google account setup", '
+         '"Use test points if recovery inaccessible"]', 0.7, 'complete')
     ]
     
-    for method in h40_methods:
-        cursor.execute('''
-            INSERT INTO hisense_unlock_methods 
-            (model, lock_type, method_name, tools_required, steps, success_rate, data_loss)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', method)
+    _seed_rows(cursor, 'hisense_unlock_methods', (
+        'model', 'lock_type', 'method_name', 'tools_required', 'steps', 'success_rate', 'data_loss'
+    ), h40_methods)
     
     conn.commit()
-    conn.close()
     
     print("Database initialized with all phone models and universal detection patterns")
 
@@ -7,11 +7,16 @@ CREATE TABLE IF NOT EXISTS phones (
     android_version TEXT,
     supported_locks TEXT,  -- JSON array of supported locks
     notes TEXT,
-    vendor_id TEXT,
-    product_id TEXT,
+    vendor_id INTEGER,  -- USB vendor ID
+    product_id INTEGER,  -- USB product ID
+    detection_priority INTEGER DEFAULT 1,  -- lower is tried first
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS idx_phones_vp ON phones(vendor_id, product_id);
+CREATE INDEX IF NOT EXISTS idx_phones_priority ON phones(detection_priority);
+CREATE INDEX IF NOT EXISTS idx_phones_prio1 ON phones(vendor_id, product_id) WHERE detection_priority = 1;
+
 CREATE TABLE IF NOT EXISTS firmware (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     brand TEXT NOT NULL,
@@ -57,9 +62,9 @@ CREATE TABLE IF NOT EXISTS tool_integration (
 
 -- Insert sample data
 INSERT INTO phones (brand, model, model_number, android_version, supported_locks, vendor_id, product_id) VALUES
-('Samsung', 'Galaxy S21', 'SM-G991U', '12', '["frp", "kg_lock", "bootloader", "screen_lock"]', '04e8', '6860'),
-('Apple', 'iPhone 13', 'A2483', '15', '["icloud", "screen_lock"]', '05ac', '12a8'),
-('Xiaomi', 'Redmi Note 10', 'M2101K7AG', '11', '["frp", "bootloader", "screen_lock"]', '2717', 'ff40');
+('Samsung', 'Galaxy S21', 'SM-G991U', '12', '["frp", "kg_lock", "bootloader", "screen_lock"]', 0x04e8, 0x6860),
+('Apple', 'iPhone 13', 'A2483', '15', '["icloud", "screen_lock"]', 0x05ac, 0x12a8),
+('Xiaomi', 'Redmi Note 10', 'M2101K7AG', '11', '["frp", "bootloader", "screen_lock"]', 0x2717, 0xff40);
 
 INSERT INTO firmware (brand, model, version, region, android_version, download_url, is_latest) VALUES
 ('Samsung', 'Galaxy S21', 'G991USQU5CVA5', 'USA (TMB)', '12', 'https://firmware.samsung.com/G991USQU5CVA5', 1),
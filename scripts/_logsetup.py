@@ -0,0 +1,38 @@
+"""
+Shared logging setup for the maintenance scripts
+Log records are queued and written by a single background listener thread
+"""
+
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def setup_queue_logging(log_file, level: int = logging.INFO):
+    """Route root logging through a queue to a file and the console, once per process"""
+    global _listener
+    
+    with _listener_lock:
+        if _listener is not None:
+            return
+        
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.FileHandler(log_file), logging.StreamHandler()]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        # The queue side only renders the message; the listener's handlers apply LOG_FORMAT
+        log_queue = queue.Queue(-1)
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        logging.basicConfig(level=level, handlers=[queue_handler])
+        
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -8,33 +8,138 @@ import os
 import sys
 import logging
 import argparse
-from typing import Dict, List, Any
+import asyncio
+import hashlib
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Any
 
 # Add project root to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from scripts._logsetup import setup_queue_logging
+
+def _result_tags(result: Any) -> tuple:
+    """Tags earned by what a step's result reports, checked on its own and nested fields"""
+    if not isinstance(result, dict):
+        return ()
+    
+    from backend.config.hisense_config import HISENSE_CONFIG
+    reported = [result, *(value for value in result.values() if isinstance(value, dict))]
+    for fields in reported:
+        if (str(fields.get('brand', '')).lower() == 'hisense'
+                or fields.get('model') in HISENSE_CONFIG['supported_models']):
+            return ('hisense',)
+    return ()
+
+def _shared_instance(factory):
+    """Build the factory's instance once and lend it to one step at a time"""
+    build_lock = threading.Lock()
+    use_lock = threading.Lock()
+    cached = lru_cache(maxsize=None)(factory)
+    
+    @contextmanager
+    @wraps(factory)
+    def use_instance():
+        with build_lock:
+            instance = cached()
+        # These classes make no thread-safety promise, so parallel steps take turns
+        with use_lock:
+            yield instance
+    
+    use_instance.cache_clear = cached.cache_clear
+    return use_instance
+
+@_shared_instance
+def _get_risk_assessor():
+    from ai_models.self_healing.model import RiskAssessor
+    return RiskAssessor()
+
+@_shared_instance
+def _get_strategy_generator():
+    from ai_models.multi_agent.orchestrator import StrategyGenerator
+    return StrategyGenerator()
+
+@_shared_instance
+def _get_orchestrator():
+    from backend.services.ai_orchestrator import AIOrchestrator
+    return AIOrchestrator()
+
+# The joblib wrapper is safe to share; a racing first call only builds it twice
+@lru_cache(maxsize=None)
+def _get_test_runner():
+    from joblib import Memory
+    memory = Memory(str(_PROJECT_ROOT / 'cache' / 'deploy_tests'), verbose=0)
+    return memory.cache(_run_test_call, ignore=['fn'])
+
+def _run_test_call(fn, name, model_version, code_hash, model_mtime, args):
+    return fn(*args)
+
+@lru_cache(maxsize=None)
+def _source_hash(path: str) -> str:
+    """Fingerprint of a source file, so code changes invalidate cached test results"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def _cached_test_call(fn, *args, model_path=None, model_version=None, refresh=False):
+    """Run a deployment test inference, reusing the stored result for unchanged models, code and inputs"""
+    # Without a model file there is nothing to invalidate on, so always run live
+    if refresh or not (model_path and os.path.exists(model_path)):
+        return fn(*args)
+    
+    # Retraining, a version bump or editing the model's code each start a new entry
+    code_hash = _source_hash(inspect.getsourcefile(fn))
+    model_mtime = os.path.getmtime(model_path)
+    return _get_test_runner()(fn, fn.__qualname__, model_version, code_hash, model_mtime, args)
 
 class AIDeployer:
-    def __init__(self):
+    def __init__(self, force: bool = False):
+        self.force = force
         self.setup_logging()
         self.deployment_status = {}
+        self._status_lock = threading.Lock()
         
     def setup_logging(self):
         """Setup logging configuration"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('logs/ai_deployment.log'),
-                logging.StreamHandler()
-            ]
-        )
+        setup_queue_logging(_PROJECT_ROOT / 'logs' / 'ai_deployment.log')
         self.logger = logging.getLogger('AIDeployer')
     
     def deploy_all_ai(self) -> Dict[str, Any]:
         """Deploy all AI models and agents"""
         self.logger.info("Starting AI deployment...")
         
-        deployment_steps = [
+        deployment_steps = self._deployment_steps()
+        
+        # Steps share nothing but deployment_status, so run them side by side
+        with ThreadPoolExecutor(max_workers=len(deployment_steps)) as executor:
+            futures = [executor.submit(self._run_deployment_step, step) for step in deployment_steps]
+            for future in as_completed(futures):
+                future.result()
+        
+        self._order_deployment_status(deployment_steps)
+        return self._generate_deployment_report()
+    
+    async def deploy_all_ai_async(self) -> Dict[str, Any]:
+        """Deploy all AI models and agents from async code"""
+        self.logger.info("Starting AI deployment...")
+        
+        deployment_steps = self._deployment_steps()
+        await asyncio.gather(
+            *(asyncio.to_thread(self._run_deployment_step, step) for step in deployment_steps),
+            return_exceptions=True
+        )
+        
+        self._order_deployment_status(deployment_steps)
+        return self._generate_deployment_report()
+    
+    def _deployment_steps(self) -> List[Callable[[], Dict[str, Any]]]:
+        """Deployment steps in pipeline order"""
+        return [
             self.deploy_phone_detection_ai,
             self.deploy_unlock_recommender_ai,
             self.deploy_self_healing_ai,
@@ -42,24 +147,36 @@ class AIDeployer:
             self.deploy_risk_assessment_ai,
             self.activate_ai_orchestrator
         ]
+    
+    def _order_deployment_status(self, deployment_steps) -> None:
+        """Report components in pipeline order rather than completion order"""
+        with self._status_lock:
+            self.deployment_status = {
+                step.__name__: self.deployment_status[step.__name__]
+                for step in deployment_steps
+                if step.__name__ in self.deployment_status
+            }
+    
+    def _run_deployment_step(self, step) -> None:
+        """Run one deployment step and record its outcome"""
+        step_name = step.__name__
+        try:
+            self.logger.info(f"Executing: {step_name}")
+            result = step()
+            status = {
+                'status': 'success',
+                'result': result,
+                'tags': _result_tags(result)
+            }
+        except Exception as e:
+            self.logger.error(f"Failed {step_name}: {str(e)}")
+            status = {
+                'status': 'failed',
+                'error': str(e)
+            }
         
-        for step in deployment_steps:
-            try:
-                step_name = step.__name__
-                self.logger.info(f"Executing: {step_name}")
-                result = step()
-                self.deployment_status[step_name] = {
-                    'status': 'success',
-                    'result': result
-                }
-            except Exception as e:
-                self.logger.error(f"Failed {step_name}: {str(e)}")
-                self.deployment_status[step_name] = {
-                    'status': 'failed',
-                    'error': str(e)
-                }
-        
-        return self._generate_deployment_report()
+        with self._status_lock:
+            self.deployment_status[step_name] = status
     
     def deploy_phone_detection_ai(self) -> Dict[str, Any]:
         """Deploy phone detection AI model"""
@@ -70,7 +187,7 @@ class AIDeployer:
             detector = PhoneDetectionAI()
             
             # Load pre-trained weights
-            model_path = 'ai_models/phone_detection/phone_detection_model.pth'
+            model_path = str(_PROJECT_ROOT / 'ai_models' / 'phone_detection' / 'phone_detection_model.pth')
             if os.path.exists(model_path):
                 detector.load_model(model_path)
                 self.logger.info("Phone detection model loaded successfully")
@@ -82,7 +199,10 @@ class AIDeployer:
                 'vendor_id': '04e8',
                 'product_id': '6860'
             }
-            test_prediction = detector.predict_phone(test_data)
+            test_prediction = _cached_test_call(
+                detector.predict_phone, test_data,
+                model_path=model_path, model_version='1.0', refresh=self.force
+            )
             
             return {
                 'model': 'PhoneDetectionAI',
@@ -103,7 +223,7 @@ class AIDeployer:
             recommender = UnlockRecommenderAI()
             
             # Load trained model
-            model_path = 'ai_models/unlock_recommender/unlock_model.joblib'
+            model_path = str(_PROJECT_ROOT / 'ai_models' / 'unlock_recommender' / 'unlock_model.joblib')
             if os.path.exists(model_path):
                 recommender.load_model(model_path)
                 self.logger.info("Unlock recommender model loaded successfully")
@@ -117,7 +237,10 @@ class AIDeployer:
                 'android_version': '12',
                 'lock_type': 'frp'
             }
-            test_recommendation = recommender.recommend_method(test_phone, 'frp')
+            test_recommendation = _cached_test_call(
+                recommender.recommend_method, test_phone, 'frp',
+                model_path=model_path, model_version='1.0', refresh=self.force
+            )
             
             return {
                 'model': 'UnlockRecommenderAI',
@@ -132,15 +255,17 @@ class AIDeployer:
     def deploy_self_healing_ai(self) -> Dict[str, Any]:
         """Deploy self-healing AI system"""
         try:
-            from ai_models.self_healing.model import RiskAssessor, FailurePredictor
+            from ai_models.self_healing.model import FailurePredictor
             
             # Initialize components
-            risk_assessor = RiskAssessor()
             failure_predictor = FailurePredictor()
             
             # Test components
             test_phone_data = {'model': 'HLTE230E', 'lock_type': 'frp'}
-            risk_assessment = risk_assessor.assess_unlock_risk(test_phone_data)
+            with _get_risk_assessor() as risk_assessor:
+                risk_assessment = _cached_test_call(
+                    risk_assessor.assess_unlock_risk, test_phone_data, refresh=self.force
+                )
             
             test_metrics = {
                 'cpu_percent': 75,
@@ -163,16 +288,14 @@ class AIDeployer:
     def deploy_multi_agent_system(self) -> Dict[str, Any]:
         """Deploy multi-agent AI system"""
         try:
-            from ai_models.multi_agent.orchestrator import StrategyGenerator
-            from backend.services.ai_orchestrator import AIOrchestrator
-            
             # Initialize orchestrator
-            orchestrator = AIOrchestrator()
-            strategy_generator = StrategyGenerator()
+            with _get_orchestrator():
+                pass
             
             # Test strategy generation
             test_phone = {'model': 'HLTE230E', 'lock_type': 'frp'}
-            test_strategy = strategy_generator.generate_unlock_strategy(test_phone)
+            with _get_strategy_generator() as strategy_generator:
+                test_strategy = strategy_generator.generate_unlock_strategy(test_phone)
             
             return {
                 'system': 'MultiAgentAI',
@@ -188,17 +311,16 @@ class AIDeployer:
     def deploy_risk_assessment_ai(self) -> Dict[str, Any]:
         """Deploy risk assessment AI"""
         try:
-            from ai_models.self_healing.model import RiskAssessor
-            
-            risk_ai = RiskAssessor()
-            
             # Test risk assessment
             test_case = {
                 'model': 'HLTE230E',
                 'lock_type': 'frp',
                 'bootloader_status': 'locked'
             }
-            risk_assessment = risk_ai.assess_unlock_risk(test_case)
+            with _get_risk_assessor() as risk_ai:
+                risk_assessment = _cached_test_call(
+                    risk_ai.assess_unlock_risk, test_case, refresh=self.force
+                )
             
             return {
                 'model': 'RiskAssessor',
@@ -213,11 +335,6 @@ class AIDeployer:
     def activate_ai_orchestrator(self) -> Dict[str, Any]:
         """Activate the AI orchestrator"""
         try:
-            from backend.services.ai_orchestrator import AIOrchestrator
-            import asyncio
-            
-            orchestrator = AIOrchestrator()
-            
             # Test activation with sample data
             test_phone = {
                 'model': 'HLTE230E',
@@ -225,16 +342,9 @@ class AIDeployer:
                 'connection_type': 'usb'
             }
             
-            # Run async test
-            async def test_orchestrator():
-                return await orchestrator.activate_all_ai(test_phone)
-            
-            # For testing, we'll run it synchronously
-            import asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            test_result = loop.run_until_complete(test_orchestrator())
-            loop.close()
+            # Runs on a worker thread, which has no event loop of its own
+            with _get_orchestrator() as orchestrator:
+                test_result = asyncio.run(orchestrator.activate_all_ai(test_phone))
             
             return {
                 'orchestrator': 'AIOrchestrator',
@@ -280,7 +390,7 @@ class AIDeployer:
         if failed_components:
             recommendations.append(f"Investigate failed components: {', '.join(failed_components)}")
         
-        if any('hisense' in str(status.get('result', {})).lower() 
+        if any('hisense' in status.get('tags', ())
                for status in self.deployment_status.values()):
             recommendations.append("Hisense AI models deployed successfully")
         
@@ -293,16 +403,17 @@ def main():
     """Main deployment function"""
     parser = argparse.ArgumentParser(description='Deploy AI models for phone unlock system')
     parser.add_argument('--component', type=str, help='Specific component to deploy')
-    parser.add_argument('--force', action='store_true', help='Force redeployment')
+    parser.add_argument('--force', action='store_true', help='Force redeployment and rerun cached test inferences')
     
     args = parser.parse_args()
     
-    deployer = AIDeployer()
+    deployer = AIDeployer(force=args.force)
     
     if args.component:
-        # Deploy specific component
-        if hasattr(deployer, f'deploy_{args.component}'):
-            result = getattr(deployer, f'deploy_{args.component}')()
+        # Deploy specific component; only its own AI modules get imported
+        deploy_component = getattr(deployer, f'deploy_{args.component}', None)
+        if callable(deploy_component) and args.component != 'all_ai':
+            result = deploy_component()
             print(f"Deployed {args.component}: {result}")
         else:
             print(f"Unknown component: {args.component}")
@@ -4,33 +4,54 @@ System Monitoring Script for Phone Unlock AI
 Monitors system health and performs self-healing
 """
 
-import time
+import asyncio
 import logging
-import schedule
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add project root to path
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from scripts._logsetup import setup_queue_logging
+
+def _dumps(payload: dict) -> bytes:
+    """Encode as indented JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    return json.dumps(payload, indent=2).encode()
+
+def _atomic_write_json(path: Path, payload: dict):
+    """Write JSON beside the target and swap it in, so readers never see a partial file"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_dumps(payload))
+    os.replace(tmp_path, path)
 
 class SystemMonitor:
     def __init__(self):
         self.setup_logging()
-        self.health_history = []
+        self.health_history = deque(maxlen=100)  # Keep only last 100 records
+        self._healthy_count = 0  # Healthy records currently in health_history
+        self._recent_scores = deque(maxlen=5)  # Scores of the last 5 records, for the trend
         self.self_healing = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-writer')
         
     def setup_logging(self):
         """Setup monitoring logging"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('logs/system_monitor.log'),
-                logging.StreamHandler()
-            ]
-        )
+        setup_queue_logging(_PROJECT_ROOT / 'logs' / 'system_monitor.log')
         self.logger = logging.getLogger('SystemMonitor')
         
     def initialize_self_healing(self):
@@ -51,27 +72,55 @@ class SystemMonitor:
         
         try:
             health_status = self.self_healing.monitor_system_health()
-            self.health_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'status': health_status
-            })
+            return self._record_health(health_status)
             
-            # Keep only last 100 records
-            if len(self.health_history) > 100:
-                self.health_history = self.health_history[-100:]
-            
-            # Log health status
-            if health_status['overall_health'] != 'healthy':
-                self.logger.warning(f"System health degraded: {health_status['issues']}")
-            else:
-                self.logger.info("System health: ✅ Healthy")
-                
-            return health_status
+        except Exception as e:
+            self.logger.error(f"Health monitoring failed: {e}")
+            return None
+    
+    async def monitor_health_async(self):
+        """Perform health monitoring without blocking the event loop"""
+        if not self.self_healing:
+            self.initialize_self_healing()
+            if not self.self_healing:
+                return
+        
+        try:
+            # Only the check itself leaves the loop; history is updated on the loop thread
+            health_status = await asyncio.to_thread(self.self_healing.monitor_system_health)
+            return self._record_health(health_status)
             
         except Exception as e:
             self.logger.error(f"Health monitoring failed: {e}")
             return None
     
+    def _record_health(self, health_status: dict) -> dict:
+        """Add a health check result to the history and log it"""
+        self._record_health_counts(health_status['overall_health'])
+        self.health_history.append({
+            'timestamp': datetime.now().isoformat(),
+            'status': health_status
+        })
+        
+        # Log health status
+        if health_status['overall_health'] != 'healthy':
+            self.logger.warning(f"System health degraded: {health_status['issues']}")
+        else:
+            self.logger.info("System health: ✅ Healthy")
+            
+        return health_status
+    
+    def _record_health_counts(self, status: str):
+        """Update running counters for a record about to enter health_history"""
+        if len(self.health_history) == self.health_history.maxlen:
+            evicted = self.health_history[0]
+            if evicted['status']['overall_health'] == 'healthy':
+                self._healthy_count -= 1
+        
+        if status == 'healthy':
+            self._healthy_count += 1
+        self._recent_scores.append(1 if status == 'healthy' else 0.5 if status == 'degraded' else 0)
+    
     def generate_health_report(self) -> dict:
         """Generate health report"""
         if not self.health_history:
@@ -97,27 +146,15 @@ class SystemMonitor:
         if not self.health_history:
             return 0.0
         
-        healthy_count = sum(1 for record in self.health_history 
-                          if record['status']['overall_health'] == 'healthy')
-        
-        return healthy_count / len(self.health_history)
+        return self._healthy_count / len(self.health_history)
     
     def _calculate_health_trend(self) -> str:
         """Calculate health trend (improving/stable/degrading)"""
-        if len(self.health_history) < 2:
-            return 'unknown'
-        
         # Check last 5 records
-        recent = self.health_history[-5:]
-        health_scores = []
-        
-        for record in recent:
-            status = record['status']['overall_health']
-            score = 1 if status == 'healthy' else 0.5 if status == 'degraded' else 0
-            health_scores.append(score)
+        health_scores = list(self._recent_scores)
         
         if len(health_scores) < 2:
-            return 'stable'
+            return 'unknown'
         
         # Simple trend calculation
         first_half = health_scores[:len(health_scores)//2]
@@ -141,11 +178,11 @@ class SystemMonitor:
             recommendations.append("System reliability below 80%, consider maintenance")
         
         # Check for frequent component issues
-        component_issues = {}
-        for record in self.health_history[-10:]:  # Last 10 records
-            for issue in record['status'].get('issues', []):
-                component = issue.split(':')[0]
-                component_issues[component] = component_issues.get(component, 0) + 1
+        component_issues = Counter(
+            issue.partition(':')[0]
+            for record in islice(self.health_history, max(0, len(self.health_history) - 10), None)  # Last 10 records
+            for issue in record['status'].get('issues', ())
+        )
         
         for component, count in component_issues.items():
             if count >= 5:  # Appears in 50%+ of recent checks
@@ -157,34 +194,60 @@ class SystemMonitor:
         """Start continuous monitoring"""
         self.logger.info(f"Starting continuous monitoring (interval: {interval_minutes} minutes)")
         
-        schedule.every(interval_minutes).minutes.do(self.monitor_health)
-        
-        # Also schedule daily report generation
-        schedule.every().day.at("08:00").do(self.generate_daily_report)
-        
         try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+            asyncio.run(self._run(interval_minutes))
         except KeyboardInterrupt:
             self.logger.info("Monitoring stopped by user")
     
+    async def _run(self, interval_minutes: int):
+        """Check health every interval, with daily reports alongside"""
+        daily_reports = asyncio.create_task(self._run_daily_reports())
+        try:
+            while True:
+                await self.monitor_health_async()
+                await asyncio.sleep(interval_minutes * 60)
+        finally:
+            daily_reports.cancel()
+    
+    async def _run_daily_reports(self):
+        """Generate the daily report at 08:00 every day"""
+        while True:
+            now = datetime.now()
+            next_run = now.replace(hour=8, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            
+            try:
+                self.generate_daily_report()
+            except Exception as e:
+                self.logger.error(f"Daily report generation failed: {e}")
+    
     def generate_daily_report(self):
         """Generate daily health report"""
         report = self.generate_health_report()
         
-        report_file = f"reports/daily_health_{datetime.now().strftime('%Y%m%d')}.json"
+        reports_dir = _PROJECT_ROOT / 'reports'
+        report_file = reports_dir / f"daily_health_{datetime.now().strftime('%Y%m%d')}.json"
         
-        os.makedirs('reports', exist_ok=True)
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        os.makedirs(reports_dir, exist_ok=True)
         
-        self.logger.info(f"Daily report generated: {report_file}")
+        # Disk I/O happens on the writer thread, off the monitoring loop
+        future = self._writer.submit(_atomic_write_json, report_file, report)
+        future.add_done_callback(lambda done: self._log_report_written(report_file, done))
         
         # Send alert if health is poor
         if report['current_health'] != 'healthy':
             self._send_health_alert(report)
     
+    def _log_report_written(self, report_file: Path, future):
+        """Log the outcome of a background report write"""
+        error = future.exception()
+        if error:
+            self.logger.error(f"Failed to write daily report {report_file}: {error}")
+        else:
+            self.logger.info(f"Daily report generated: {report_file}")
+    
     def _send_health_alert(self, report: dict):
         """Send health alert (placeholder for notification system)"""
         message = f"🚨 System Health Alert: {report['current_health']}"
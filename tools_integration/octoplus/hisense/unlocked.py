@@ -1,57 +1,83 @@
 import subprocess
+import functools
 import os
+import shutil
+import re
 import logging
 from typing import Dict, List, Any
 import tempfile
 
+from ..tool_runner import probe_version, run_tool_async, stream_tool
+
+# `Key: value` lines of `--operation read_info` output, and the field each key maps to
+DEVICE_INFO_LINE = re.compile(r'^[ \t]*(?P<key>Model|Android|Build|Chipset):(?P<value>.*)$', re.MULTILINE)
+DEVICE_INFO_FIELDS = {
+    'Model': 'model',
+    'Android': 'android_version',
+    'Build': 'build_number',
+    'Chipset': 'chipset'
+}
+
+# Output lines that mark each operation as successful
+FLASH_SUCCESS = 'Flash completed successfully'
+FRP_SUCCESS = 'FRP removed'
+FORMAT_SUCCESS = 'Format completed'
+
+@functools.lru_cache(maxsize=1)
+def _resolve_hisense_tool() -> str:
+    """Find Hisense unlocking tool, once per process"""
+    on_path = shutil.which('hisense_flash')
+    if on_path:
+        return on_path
+    
+    possible_paths = [
+        "C:\\Program Files\\Hisense\\HisenseFlashTool.exe",
+        "C:\\Hisense\\HisenseTool.exe",
+        "/usr/local/bin/hisense_tool",
+        "./tools/hisense/hisense_flash"
+    ]
+    
+    for path in possible_paths:
+        if os.path.isfile(path):
+            return path
+    
+    return "hisense_flash"  # Assume in PATH
+
 class HisenseUnlockTool:
     """Integration with Hisense official unlocking tools"""
     
     def __init__(self, tool_path: str = None):
-        self.tool_path = tool_path or self._find_hisense_tool()
+        self.tool_path = tool_path or _resolve_hisense_tool()
         self.logger = logging.getLogger(__name__)
         
-    def _find_hisense_tool(self) -> str:
-        """Find Hisense unlocking tool"""
-        possible_paths = [
-            "C:\\Program Files\\Hisense\\HisenseFlashTool.exe",
-            "C:\\Hisense\\HisenseTool.exe",
-            "/usr/local/bin/hisense_tool",
-            "./tools/hisense/hisense_flash"
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-        
-        return "hisense_flash"  # Assume in PATH
-    
     def flash_firmware(self, firmware_path: str, model: str) -> Dict[str, Any]:
         """Flash firmware to Hisense device"""
         try:
-            cmd = [
-                self.tool_path,
-                '--model', model,
-                '--firmware', firmware_path,
-                '--operation', 'flash',
-                '--auto-reboot'
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minutes timeout
+            result, success = stream_tool(
+                self._flash_command(firmware_path, model),
+                timeout=600,  # 10 minutes timeout
+                match=lambda line: FLASH_SUCCESS in line
             )
             
-            success = 'Flash completed successfully' in result.stdout
+            return self._flash_result(result, success)
             
+        except subprocess.TimeoutExpired:
+            return {
+                'success': False,
+                'error': 'Flash operation timed out (10 minutes)'
+            }
+        except Exception as e:
             return {
-                'success': success,
-                'output': result.stdout,
-                'error': result.stderr,
-                'return_code': result.returncode
+                'success': False,
+                'error': f'Flash failed: {str(e)}'
             }
+    
+    async def flash_firmware_async(self, firmware_path: str, model: str) -> Dict[str, Any]:
+        """Flash firmware to Hisense device without blocking the event loop"""
+        try:
+            result = await run_tool_async(self._flash_command(firmware_path, model), timeout=600)
+            
+            return self._flash_result(result)
             
         except subprocess.TimeoutExpired:
             return {
@@ -64,29 +90,49 @@ class HisenseUnlockTool:
                 'error': f'Flash failed: {str(e)}'
             }
     
+    def _flash_command(self, firmware_path: str, model: str) -> List[str]:
+        return [
+            self.tool_path,
+            '--model', model,
+            '--firmware', firmware_path,
+            '--operation', 'flash',
+            '--auto-reboot'
+        ]
+    
+    def _flash_result(self, result: subprocess.CompletedProcess, success: bool = None) -> Dict[str, Any]:
+        if success is None:
+            success = FLASH_SUCCESS in result.stdout
+        
+        return {
+            'success': success,
+            'output': result.stdout,
+            'error': result.stderr,
+            'return_code': result.returncode
+        }
+    
     def remove_frp(self, model: str) -> Dict[str, Any]:
         """Remove FRP lock from Hisense device"""
         try:
-            cmd = [
-                self.tool_path,
-                '--model', model,
-                '--operation', 'frp_remove'
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutes
+            result, success = stream_tool(
+                self._frp_command(model),
+                timeout=300,  # 5 minutes
+                match=lambda line: FRP_SUCCESS in line
             )
             
-            success = 'FRP removed' in result.stdout
+            return self._frp_result(result, success)
             
+        except Exception as e:
             return {
-                'success': success,
-                'output': result.stdout,
-                'logs': result.stdout.split('\n')
+                'success': False,
+                'error': str(e)
             }
+    
+    async def remove_frp_async(self, model: str) -> Dict[str, Any]:
+        """Remove FRP lock from Hisense device without blocking the event loop"""
+        try:
+            result = await run_tool_async(self._frp_command(model), timeout=300)
+            
+            return self._frp_result(result)
             
         except Exception as e:
             return {
@@ -94,26 +140,46 @@ class HisenseUnlockTool:
                 'error': str(e)
             }
     
+    def _frp_command(self, model: str) -> List[str]:
+        return [
+            self.tool_path,
+            '--model', model,
+            '--operation', 'frp_remove'
+        ]
+    
+    def _frp_result(self, result: subprocess.CompletedProcess, success: bool = None) -> Dict[str, Any]:
+        if success is None:
+            success = FRP_SUCCESS in result.stdout
+        
+        return {
+            'success': success,
+            'logs': result.stdout.splitlines()
+        }
+    
     def read_device_info(self) -> Dict[str, Any]:
         """Read information from connected Hisense device"""
         try:
-            cmd = [self.tool_path, '--operation', 'read_info']
-            
             result = subprocess.run(
-                cmd,
+                [self.tool_path, '--operation', 'read_info'],
                 capture_output=True,
                 text=True,
                 timeout=30
             )
             
-            # Parse device information from output
-            info = self._parse_device_info(result.stdout)
+            return self._device_info_result(result)
             
+        except Exception as e:
             return {
-                'success': True,
-                'device_info': info,
-                'raw_output': result.stdout
+                'success': False,
+                'error': str(e)
             }
+    
+    async def read_device_info_async(self) -> Dict[str, Any]:
+        """Read information from connected Hisense device without blocking the event loop"""
+        try:
+            result = await run_tool_async([self.tool_path, '--operation', 'read_info'], timeout=30)
+            
+            return self._device_info_result(result)
             
         except Exception as e:
             return {
@@ -121,45 +187,46 @@ class HisenseUnlockTool:
                 'error': str(e)
             }
     
+    def _device_info_result(self, result: subprocess.CompletedProcess) -> Dict[str, Any]:
+        # Parse device information from output
+        info = self._parse_device_info(result.stdout)
+        
+        return {
+            'success': True,
+            'device_info': info,
+            'raw_output': result.stdout
+        }
+    
     def _parse_device_info(self, output: str) -> Dict[str, str]:
         """Parse device information from tool output"""
-        info = {}
-        lines = output.split('\n')
-        
-        for line in lines:
-            if 'Model:' in line:
-                info['model'] = line.split('Model:')[-1].strip()
-            elif 'Android:' in line:
-                info['android_version'] = line.split('Android:')[-1].strip()
-            elif 'Build:' in line:
-                info['build_number'] = line.split('Build:')[-1].strip()
-            elif 'Chipset:' in line:
-                info['chipset'] = line.split('Chipset:')[-1].strip()
-                
-        return info
+        return {
+            DEVICE_INFO_FIELDS[match['key']]: match['value'].strip()
+            for match in DEVICE_INFO_LINE.finditer(output)
+        }
     
     def format_device(self, model: str) -> Dict[str, Any]:
         """Format Hisense device (factory reset via tool)"""
         try:
-            cmd = [
-                self.tool_path,
-                '--model', model,
-                '--operation', 'format'
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=180  # 3 minutes
+            result, success = stream_tool(
+                self._format_command(model),
+                timeout=180,  # 3 minutes
+                match=lambda line: FORMAT_SUCCESS in line
             )
             
-            success = 'Format completed' in result.stdout
+            return self._format_result(result, success)
             
+        except Exception as e:
             return {
-                'success': success,
-                'output': result.stdout
+                'success': False,
+                'error': str(e)
             }
+    
+    async def format_device_async(self, model: str) -> Dict[str, Any]:
+        """Format Hisense device without blocking the event loop"""
+        try:
+            result = await run_tool_async(self._format_command(model), timeout=180)
+            
+            return self._format_result(result)
             
         except Exception as e:
             return {
@@ -167,14 +234,23 @@ class HisenseUnlockTool:
                 'error': str(e)
             }
     
-    def check_tool_health(self) -> bool:
+    def _format_command(self, model: str) -> List[str]:
+        return [
+            self.tool_path,
+            '--model', model,
+            '--operation', 'format'
+        ]
+    
+    def _format_result(self, result: subprocess.CompletedProcess, success: bool = None) -> Dict[str, Any]:
+        if success is None:
+            success = FORMAT_SUCCESS in result.stdout
+        
+        return {
+            'success': success,
+            'output': result.stdout
+        }
+    
+    def check_tool_health(self, force: bool = False) -> bool:
         """Check if Hisense tool is working"""
-        try:
-            result = subprocess.run(
-                [self.tool_path, '--version'],
-                capture_output=True,
-                timeout=10
-            )
-            return result.returncode == 0
-        except:
-            return False
+        ok, _ = probe_version(self.tool_path, force)
+        return ok
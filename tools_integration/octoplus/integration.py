@@ -1,11 +1,37 @@
 import subprocess
+import asyncio
 import json
 import os
-from typing import Dict, Any
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any
+
+from .tool_runner import probe_version, run_tool_async, stream_tool
+
+# Any of these in the tool's stdout marks the operation as successful
+SUCCESS_INDICATORS = re.compile(r'successfully|completed|unlocked|bypassed', re.IGNORECASE)
+
+# Unlocks that may run at once, per batch or through execute_unlock_future
+MAX_CONCURRENT_UNLOCKS = 4
 
 class OctoplusIntegration:
     """Integration with Octoplus unlocking tool"""
     
+    # Fixed arguments per operation, and the optional parameter each one accepts
+    _OP_TEMPLATES = {
+        'frp_unlock': ('--operation', 'frp_bypass'),
+        'kg_reset': ('--operation', 'kg_reset', '--force', 'true'),
+        'bootloader_unlock': ('--operation', 'bootloader_unlock'),
+        'flash_firmware': ('--operation', 'flash')
+    }
+    _OP_PARAMS = {
+        'frp_unlock': ('method', '--method'),
+        'flash_firmware': ('firmware_path', '--firmware')
+    }
+    
+    # Shared across instances; threads start on first submit
+    _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_UNLOCKS, thread_name_prefix='octoplus')
+    
     def __init__(self, tool_path: str = None):
         self.tool_path = tool_path or "C:\\Program Files\\Octoplus\\octoplus.exe"
         self.supported_operations = [
@@ -19,12 +45,32 @@ class OctoplusIntegration:
             command = self._build_command(phone_model, operation, kwargs)
             
             # Execute command
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutes timeout
-            )
+            result, success = stream_tool(command, timeout=300, match=SUCCESS_INDICATORS.search)  # 5 minutes timeout
+            
+            return self._parse_result(result, operation, success)
+            
+        except subprocess.TimeoutExpired:
+            return {
+                'success': False,
+                'error': 'Operation timed out',
+                'logs': ['Process exceeded time limit']
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'logs': [f'Execution failed: {e}']
+            }
+    
+    def execute_unlock_future(self, phone_model: str, operation: str, **kwargs) -> Future:
+        """Queue an unlock operation and return a Future for its result dict"""
+        return self._executor.submit(self.execute_unlock, phone_model, operation, **kwargs)
+    
+    async def execute_unlock_async(self, phone_model: str, operation: str, **kwargs) -> Dict[str, Any]:
+        """Execute unlock operation using Octoplus without blocking the event loop"""
+        try:
+            command = self._build_command(phone_model, operation, kwargs)
+            result = await run_tool_async(command, timeout=300)  # 5 minutes timeout
             
             return self._parse_result(result, operation)
             
@@ -41,54 +87,46 @@ class OctoplusIntegration:
                 'logs': [f'Execution failed: {e}']
             }
     
+    async def batch_execute(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run several unlock jobs concurrently, one result per job in order"""
+        limit = asyncio.Semaphore(MAX_CONCURRENT_UNLOCKS)
+        
+        async def run_job(job):
+            async with limit:
+                return await self.execute_unlock_async(**job)
+        
+        # A malformed job fails on its own instead of cancelling the batch
+        results = await asyncio.gather(*(run_job(job) for job in jobs), return_exceptions=True)
+        return [
+            {'success': False, 'error': str(r), 'logs': [f'Execution failed: {r}']}
+            if isinstance(r, Exception) else r
+            for r in results
+        ]
+    
     def _build_command(self, phone_model: str, operation: str, params: Dict[str, Any]) -> list:
         """Build Octoplus command line arguments"""
-        base_command = [self.tool_path, '--model', phone_model]
+        command = [self.tool_path, '--model', phone_model, *self._OP_TEMPLATES.get(operation, ())]
         
-        if operation == 'frp_unlock':
-            base_command.extend(['--operation', 'frp_bypass'])
-            if params.get('method'):
-                base_command.extend(['--method', params['method']])
-                
-        elif operation == 'kg_reset':
-            base_command.extend(['--operation', 'kg_reset'])
-            base_command.extend(['--force', 'true'])
-            
-        elif operation == 'bootloader_unlock':
-            base_command.extend(['--operation', 'bootloader_unlock'])
-            
-        elif operation == 'flash_firmware':
-            base_command.extend(['--operation', 'flash'])
-            if params.get('firmware_path'):
-                base_command.extend(['--firmware', params['firmware_path']])
+        param = self._OP_PARAMS.get(operation)
+        if param and params.get(param[0]):
+            command.extend((param[1], params[param[0]]))
         
-        return base_command
+        return command
     
-    def _parse_result(self, result: subprocess.CompletedProcess, operation: str) -> Dict[str, Any]:
+    def _parse_result(self, result: subprocess.CompletedProcess, operation: str, success: bool = None) -> Dict[str, Any]:
         """Parse Octoplus tool output"""
-        success_indicators = [
-            'successfully', 'completed', 'unlocked', 'bypassed'
-        ]
-        
-        output_lower = result.stdout.lower()
-        success = any(indicator in output_lower for indicator in success_indicators)
+        if success is None:
+            success = SUCCESS_INDICATORS.search(result.stdout) is not None
         
+        # 'logs' carries the output once, already split into lines
         return {
             'success': success,
-            'output': result.stdout,
             'error': result.stderr,
             'return_code': result.returncode,
-            'logs': result.stdout.split('\n')
+            'logs': result.stdout.splitlines()
         }
     
-    def check_connection(self) -> bool:
+    def check_connection(self, force: bool = False) -> bool:
         """Check if Octoplus tool is accessible"""
-        try:
-            result = subprocess.run(
-                [self.tool_path, '--version'],
-                capture_output=True,
-                timeout=10
-            )
-            return result.returncode == 0
-        except:
-            return False
+        ok, _ = probe_version(self.tool_path, force)
+        return ok
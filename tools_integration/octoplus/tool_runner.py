@@ -0,0 +1,114 @@
+"""
+Process helpers shared by the Octoplus and Hisense tool integrations
+"""
+
+import asyncio
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
+
+# Lines of stdout, and separately of stderr, kept in streamed results
+OUTPUT_TAIL_LINES = 1000
+
+# How long to wait for stderr to reach EOF once the tool has exited, in seconds
+STDERR_DRAIN_GRACE = 5.0
+
+# How long a `--version` probe result stays valid, in seconds
+VERSION_PROBE_TTL = 60.0
+
+# Shared across integrations: tool path -> (probed_at, ok, version)
+_version_probes: Dict[str, Tuple[float, bool, str]] = {}
+
+def probe_version(tool_path: str, force: bool = False) -> Tuple[bool, str]:
+    """Run `tool --version` at most once per TTL for each tool path"""
+    now = time.monotonic()
+    probe = _version_probes.get(tool_path)
+    if not force and probe and now - probe[0] < VERSION_PROBE_TTL:
+        return probe[1], probe[2]
+    
+    try:
+        result = subprocess.run(
+            [tool_path, '--version'],
+            capture_output=True,
+            timeout=10
+        )
+        ok = result.returncode == 0
+        version = result.stdout.decode(errors='replace').strip()
+    except Exception:
+        ok, version = False, ''
+    
+    _version_probes[tool_path] = (now, ok, version)
+    return ok, version
+
+async def run_tool_async(command: List[str], timeout: float) -> subprocess.CompletedProcess:
+    """Run a tool without blocking the event loop, killing it on timeout or cancellation"""
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(command, timeout)
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+        raise
+    
+    return subprocess.CompletedProcess(
+        command, proc.returncode,
+        stdout.decode(errors='replace'), stderr.decode(errors='replace')
+    )
+
+def stream_tool(command: List[str], timeout: float, match: Callable[[str], Any]) -> Tuple[subprocess.CompletedProcess, bool]:
+    """Run a tool, keeping the tail of its output and whether `match` accepted any stdout line"""
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    err_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    matched = False
+    timed_out = threading.Event()
+    proc = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace',
+        bufsize=1
+    )
+    
+    # stderr gets its own reader so neither pipe can fill up and stall the tool
+    drain = threading.Thread(target=err_tail.extend, args=(proc.stderr,), daemon=True)
+    drain.start()
+    
+    def kill():
+        timed_out.set()
+        proc.kill()
+    
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        # Keep draining after a match so the tool never blocks on a full pipe
+        for line in proc.stdout:
+            tail.append(line)
+            if not matched and match(line):
+                matched = True
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        # The timer stays armed until the tool has exited, so this wait is bounded
+        proc.stdout.close()
+        proc.wait()
+        timer.cancel()
+        # A child the tool spawned may still hold stderr open; don't wait on it
+        drain.join(STDERR_DRAIN_GRACE)
+        if not drain.is_alive():
+            proc.stderr.close()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    return subprocess.CompletedProcess(command, proc.returncode, ''.join(tail), ''.join(err_tail)), matched